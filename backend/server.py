@@ -1,18 +1,21 @@
 from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern
 import os
 import asyncio
-import json
+import orjson
+import msgpack
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 import uuid
+import hashlib
 from datetime import datetime, timezone, timedelta
-from collections import deque
+from collections import deque, defaultdict, OrderedDict
 import pandas as pd
 import numpy as np
 from emergentintegrations.llm.chat import LlmChat, UserMessage
@@ -21,16 +24,30 @@ import time
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# LLM and CORS settings are read once at import
+EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=200,
+    minPoolSize=20,
+    maxIdleTimeMS=60000,
+    compressors="zstd",
+    tz_aware=True  # datetimes are stored as BSON dates and read back as UTC
+)
 db = client[os.environ['DB_NAME']]
+# Analysis records are a best-effort stream, so skip write acknowledgement
+market_analysis_w0 = db.get_collection("market_analysis", write_concern=WriteConcern(w=0))
 
 # Create the main app
 app = FastAPI(
     title="FinTech AI - Real-time Financial Data Platform",
     description="AI-powered financial data streaming with pattern recognition",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Create a router with the /api prefix
@@ -38,73 +55,158 @@ api_router = APIRouter(prefix="/api")
 
 # In-memory data structures for real-time processing
 class TechnicalIndicators:
-    def __init__(self, window_size: int = 50):
+    def __init__(self, window_size: int = 50, sma_periods: tuple = (20, 50),
+                 ema_period: int = 20, rsi_period: int = 14):
         self.window_size = window_size
-        self.prices = deque(maxlen=window_size)
-        self.volumes = deque(maxlen=window_size)
-        self.timestamps = deque(maxlen=window_size)
+        # Fixed-size ring buffers; ``head`` is the next write slot and ``n`` the fill level
+        self.prices = np.empty(window_size, dtype=np.float64)
+        self.volumes = np.empty(window_size, dtype=np.int64)
+        self.timestamps = np.empty(window_size, dtype=object)
+        self.n = 0
+        self.head = 0
+        
+        # Running state so the default indicators update in O(1) per tick.
+        # Sums are kept relative to ``shift`` (the first price) to avoid
+        # catastrophic cancellation in the variance.
+        self.shift = 0.0
+        self.sma_sum: Dict[int, float] = {p: 0.0 for p in sma_periods}
+        self.sma_sq_sum: Dict[int, float] = {p: 0.0 for p in sma_periods}
+        self.pv_sum = 0.0
+        self.vol_sum = 0
+        self.ema_period = ema_period
+        self.ema_val: Optional[float] = None
+        self.rsi_period = rsi_period
+        self.gains = deque(maxlen=rsi_period)
+        self.losses = deque(maxlen=rsi_period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
         
     def add_data_point(self, price: float, volume: int, timestamp: datetime):
-        self.prices.append(price)
-        self.volumes.append(volume)
-        self.timestamps.append(timestamp)
+        if self.n == 0:
+            self.shift = price
+        else:
+            delta = price - self.prices[self.head - 1]
+            if len(self.gains) == self.rsi_period:
+                self.gain_sum -= self.gains[0]
+                self.loss_sum -= self.losses[0]
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_sum += gain
+            self.loss_sum += loss
+        
+        x = price - self.shift
+        for period in self.sma_sum:
+            if self.n >= period:
+                evicted = self.prices[(self.head - period) % self.window_size] - self.shift
+                self.sma_sum[period] += x - evicted
+                self.sma_sq_sum[period] += x * x - evicted * evicted
+            else:
+                self.sma_sum[period] += x
+                self.sma_sq_sum[period] += x * x
+        
+        if self.n == self.window_size:
+            self.pv_sum -= self.prices[self.head] * self.volumes[self.head]
+            self.vol_sum -= int(self.volumes[self.head])
+        self.pv_sum += price * volume
+        self.vol_sum += int(volume)
+        
+        self.prices[self.head] = price
+        self.volumes[self.head] = volume
+        self.timestamps[self.head] = timestamp
+        self.head = (self.head + 1) % self.window_size
+        if self.n < self.window_size:
+            self.n += 1
+        
+        if self.ema_val is not None:
+            multiplier = 2 / (self.ema_period + 1)
+            self.ema_val = price * multiplier + self.ema_val * (1 - multiplier)
+        elif self.n >= self.ema_period:
+            # Seed the EMA with the SMA of the first ``ema_period`` points
+            self.ema_val = float(self._tail(self.prices, self.ema_period).mean())
+    
+    def _view(self, buf: np.ndarray) -> np.ndarray:
+        """Return the filled part of a ring buffer in chronological order"""
+        if self.n < self.window_size:
+            return buf[:self.n]
+        return np.concatenate((buf[self.head:], buf[:self.head]))
+    
+    def _tail(self, buf: np.ndarray, count: int) -> np.ndarray:
+        """Return the last ``count`` filled entries in chronological order.
+
+        Only those entries are touched; when they are contiguous in the ring
+        the result is a view rather than a copy.
+        """
+        count = min(count, self.n)
+        if count <= self.head:
+            return buf[self.head - count:self.head]
+        return np.concatenate((buf[self.window_size - (count - self.head):], buf[:self.head]))
+    
+    def latest(self) -> tuple:
+        """Return the most recent (price, volume, timestamp)"""
+        i = self.head - 1
+        return float(self.prices[i]), int(self.volumes[i]), self.timestamps[i]
+    
+    def recent_prices(self, count: int) -> np.ndarray:
+        return self._tail(self.prices, count)
     
     def calculate_sma(self, period: int = 20) -> Optional[float]:
-        if len(self.prices) < period:
+        if self.n < period:
             return None
-        recent_prices = list(self.prices)[-period:]
-        return sum(recent_prices) / len(recent_prices)
+        if period in self.sma_sum:
+            return float(self.shift + self.sma_sum[period] / period)
+        return float(self._tail(self.prices, period).mean())
+    
+    def calculate_std(self, period: int = 20) -> Optional[float]:
+        if self.n < period:
+            return None
+        if period in self.sma_sum:
+            mean = self.sma_sum[period] / period
+            return float(max(self.sma_sq_sum[period] / period - mean * mean, 0.0) ** 0.5)
+        return float(self._tail(self.prices, period).std())
     
     def calculate_ema(self, period: int = 20) -> Optional[float]:
-        if len(self.prices) < period:
+        if self.n < period:
             return None
-        prices_list = list(self.prices)
+        if period == self.ema_period:
+            return self.ema_val
+        p = self._view(self.prices)
         multiplier = 2 / (period + 1)
-        ema = prices_list[0]
-        for price in prices_list[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
-        return ema
+        # Closed form of the recursive EMA seeded with the oldest price in the window
+        weights = multiplier * (1 - multiplier) ** np.arange(len(p) - 2, -1, -1)
+        return float((1 - multiplier) ** (len(p) - 1) * p[0] + np.dot(weights, p[1:]))
     
     def calculate_rsi(self, period: int = 14) -> Optional[float]:
-        if len(self.prices) < period + 1:
+        if self.n < period + 1:
             return None
         
-        prices_list = list(self.prices)
-        deltas = [prices_list[i] - prices_list[i-1] for i in range(1, len(prices_list))]
-        
-        gains = [d if d > 0 else 0 for d in deltas[-period:]]
-        losses = [-d if d < 0 else 0 for d in deltas[-period:]]
-        
-        avg_gain = sum(gains) / period
-        avg_loss = sum(losses) / period
+        if period == self.rsi_period:
+            avg_gain = max(self.gain_sum, 0.0) / period
+            avg_loss = max(self.loss_sum, 0.0) / period
+        else:
+            deltas = np.diff(self._tail(self.prices, period + 1))
+            avg_gain = np.clip(deltas, 0, None).mean()
+            avg_loss = -np.clip(deltas, None, 0).mean()
         
         if avg_loss == 0:
             return 100
         
         rs = avg_gain / avg_loss
         rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return float(rsi)
     
     def calculate_vwap(self) -> Optional[float]:
-        if len(self.prices) < 1:
+        if self.n < 1:
             return None
         
-        prices_list = list(self.prices)
-        volumes_list = list(self.volumes)
-        
-        total_pv = sum(p * v for p, v in zip(prices_list, volumes_list))
-        total_volume = sum(volumes_list)
-        
-        return total_pv / total_volume if total_volume > 0 else None
+        return float(self.pv_sum / self.vol_sum) if self.vol_sum > 0 else None
     
     def calculate_bollinger_bands(self, period: int = 20, std_dev: int = 2) -> Dict[str, Optional[float]]:
-        if len(self.prices) < period:
+        if self.n < period:
             return {"upper": None, "middle": None, "lower": None}
         
-        recent_prices = list(self.prices)[-period:]
-        sma = sum(recent_prices) / len(recent_prices)
-        variance = sum((x - sma) ** 2 for x in recent_prices) / len(recent_prices)
-        std = variance ** 0.5
+        sma = self.calculate_sma(period)
+        std = self.calculate_std(period)
         
         return {
             "upper": sma + (std * std_dev),
@@ -113,9 +215,78 @@ class TechnicalIndicators:
         }
 
 # Global variables for data management
-active_symbols: Dict[str, TechnicalIndicators] = {}
+# Indicator state per symbol, least recently updated first and capped at MAX_SYMBOLS
+MAX_SYMBOLS = 100
+active_symbols: "OrderedDict[str, TechnicalIndicators]" = OrderedDict()
+# Concurrent market data WebSockets; further connections are turned away
+MAX_WS_CONNECTIONS = 500
+WS_SEM = asyncio.Semaphore(MAX_WS_CONNECTIONS)
 websocket_connections: Dict[str, WebSocket] = {}
-mock_data_tasks: Dict[str, asyncio.Task] = {}
+# Subscribed WebSockets per symbol; the market ticker fans each update out to them
+symbol_subs: Dict[str, Set[WebSocket]] = defaultdict(set)
+
+# Background batching of market_analysis inserts
+ANALYSIS_BATCH_SIZE = 200
+ANALYSIS_FLUSH_INTERVAL = 1.0  # seconds
+_insert_queue: asyncio.Queue = asyncio.Queue()
+analysis_writer_task: Optional[asyncio.Task] = None
+
+# Static system message shared by every analysis request, so the provider-side
+# prompt cache sees an identical prefix each time
+ANALYSIS_SYSTEM_MESSAGE = "You are an AI financial analyst specialized in technical analysis and pattern recognition. Provide concise, data-driven insights based on market indicators."
+
+# Static part of the analysis prompt. It leads the user message so the
+# provider can reuse its prompt cache; the market data is appended after it.
+ANALYSIS_INSTRUCTIONS = """Please analyze each market snapshot below and provide:
+1. Pattern identification (if any)
+2. Market sentiment assessment
+3. Brief trading recommendation
+4. Confidence score (0-100)
+
+Format your response as a JSON object mapping each symbol to its analysis:
+{
+  "SYMBOL": {
+    "pattern": "pattern name or null",
+    "sentiment": "bullish/bearish/neutral",
+    "recommendation": "brief recommendation",
+    "confidence": "confidence score",
+    "reasoning": "brief explanation"
+  }
+}
+
+Market data:
+"""
+
+# Cached LLM responses expire after this many seconds (TTL index on llm_cache)
+LLM_CACHE_TTL_SECONDS = 3600
+# Cache reads and writes give up after this long; the analysis never waits on them
+LLM_CACHE_TIMEOUT_SECONDS = 1.0
+
+def new_chat() -> LlmChat:
+    """Return an LlmChat on a fresh session for a single request.
+
+    An LlmChat session keeps its whole history and resends it with every
+    message, so sessions are never reused: a shared one would grow without
+    bound and overlapping batches would interleave on it. Connection reuse is
+    left to the library's HTTP transport.
+    """
+    return LlmChat(
+        api_key=EMERGENT_LLM_KEY,
+        session_id=f"market_analysis_{uuid.uuid4()}",
+        system_message=ANALYSIS_SYSTEM_MESSAGE
+    ).with_model("openai", "gpt-4o")
+
+def parse_json_reply(reply: str) -> Any:
+    """Decode the JSON object in an LLM reply.
+
+    LlmChat offers no JSON response mode, so replies may wrap the object in
+    markdown fences or prose; everything outside the outermost braces is
+    ignored. Raises ValueError if no object can be decoded.
+    """
+    start, end = reply.find("{"), reply.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("LLM reply contains no JSON object")
+    return orjson.loads(reply[start:end + 1])
 
 # Pydantic models
 class SymbolRequest(BaseModel):
@@ -153,179 +324,413 @@ class PriceAlert(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # Mock data generator for demo purposes
-async def generate_mock_market_data(symbol: str, websocket: WebSocket):
-    """Generate realistic mock market data for demo purposes"""
-    base_price = {"AAPL": 180.0, "GOOGL": 2800.0, "TSLA": 250.0, "MSFT": 420.0, "NVDA": 800.0}.get(symbol, 100.0)
-    current_price = base_price
+rng = np.random.default_rng()
+MOCK_BATCH_SIZE = 1024  # ticks of random draws generated per refill
+TICK_INTERVAL = 2.0  # seconds between updates
+ANALYSIS_EVERY_TICKS = 10
+BASE_PRICES = {"AAPL": 180.0, "GOOGL": 2800.0, "TSLA": 250.0, "MSFT": 420.0, "NVDA": 800.0}
+
+class MockFeed:
+    """Random-walk price and volume source for one symbol"""
+    def __init__(self, symbol: str):
+        self.current_price = BASE_PRICES.get(symbol, 100.0)
+        self.volatility = 0.02  # 2% volatility
+        self._i = MOCK_BATCH_SIZE
+        
+    def next_tick(self) -> tuple:
+        # Draw random moves in batches rather than one NumPy call per tick
+        if self._i == MOCK_BATCH_SIZE:
+            self._price_changes = rng.normal(0, self.volatility, MOCK_BATCH_SIZE).tolist()
+            self._volumes = rng.integers(1000, 10000, MOCK_BATCH_SIZE).tolist()
+            self._i = 0
+        
+        # Generate realistic price movement and volume
+        self.current_price *= (1 + self._price_changes[self._i])
+        volume = self._volumes[self._i]
+        self._i += 1
+        return self.current_price, volume
+
+mock_feeds: Dict[str, MockFeed] = {}
+analysis_tasks: Set[asyncio.Task] = set()
+closing_tasks: Set[asyncio.Task] = set()
+# A subscriber that takes longer than this to accept a frame is dropped
+SEND_TIMEOUT = 1.0  # seconds
+market_ticker_task: Optional[asyncio.Task] = None
+prewarm_task: Optional[asyncio.Task] = None
+index_task: Optional[asyncio.Task] = None
+
+async def close_stalled(ws: WebSocket):
+    """Close a socket whose send timed out; the interrupted frame leaves it unusable"""
+    try:
+        await asyncio.wait_for(ws.close(code=1013), SEND_TIMEOUT)
+    except Exception:
+        pass
+
+async def broadcast(symbol: str, payload: bytes):
+    """Send an encoded frame to every subscriber of a symbol, dropping dead sockets.
+
+    Each send is bounded by SEND_TIMEOUT so one stalled client cannot hold up
+    the shared ticker; a client that times out is unsubscribed and closed.
+    """
+    subs = list(symbol_subs.get(symbol, ()))
+    results = await asyncio.gather(
+        *(asyncio.wait_for(ws.send_bytes(payload), SEND_TIMEOUT) for ws in subs),
+        return_exceptions=True
+    )
+    for ws, result in zip(subs, results):
+        if isinstance(result, Exception):
+            symbol_subs.get(symbol, set()).discard(ws)
+            if isinstance(result, asyncio.TimeoutError):
+                task = asyncio.create_task(close_stalled(ws))
+                closing_tasks.add(task)
+                task.add_done_callback(closing_tasks.discard)
+
+def update_symbol(symbol: str) -> bytes:
+    """Advance one symbol by a tick and return its encoded market_data frame"""
+    if symbol not in mock_feeds:
+        mock_feeds[symbol] = MockFeed(symbol)
+    current_price, volume = mock_feeds[symbol].next_tick()
+    
+    # Create timestamp
+    timestamp = datetime.now(timezone.utc)
+    
+    # Update technical indicators
+    if symbol in active_symbols:
+        active_symbols.move_to_end(symbol)
+    else:
+        active_symbols[symbol] = TechnicalIndicators()
+        # Evict the least recently updated symbols nobody is subscribed to; streamed
+        # symbols are never evicted (the WebSocket endpoint caps how many there are)
+        excess = len(active_symbols) - MAX_SYMBOLS
+        if excess > 0:
+            idle = [s for s in active_symbols if not symbol_subs.get(s)]
+            for evicted in idle[:excess]:
+                del active_symbols[evicted]
+    
+    indicators = active_symbols[symbol]
+    indicators.add_data_point(current_price, volume, timestamp)
+    
+    # Calculate technical indicators
+    sma_20 = indicators.calculate_sma(20)
+    sma_50 = indicators.calculate_sma(50)
+    ema_20 = indicators.calculate_ema(20)
+    rsi = indicators.calculate_rsi(14)
+    vwap = indicators.calculate_vwap()
+    bollinger = indicators.calculate_bollinger_bands()
     
+    # Create data packet
+    data = {
+        "type": "market_data",
+        "symbol": symbol,
+        "timestamp": timestamp.isoformat(),
+        "price": round(current_price, 2),
+        "volume": volume,
+        "indicators": {
+            "sma_20": round_opt(sma_20),
+            "sma_50": round_opt(sma_50),
+            "ema_20": round_opt(ema_20),
+            "rsi": round_opt(rsi),
+            "vwap": round_opt(vwap),
+            "bollinger_bands": {k: round_opt(v) for k, v in bollinger.items()}
+        }
+    }
+    return pack(data)
+
+async def market_ticker():
+    """Drive every subscribed symbol from one shared heartbeat"""
+    loop = asyncio.get_running_loop()
+    beat = 0
     while True:
+        started = loop.time()
+        beat += 1
+        
         try:
-            # Generate realistic price movement
-            volatility = 0.02  # 2% volatility
-            price_change = np.random.normal(0, volatility)
-            current_price *= (1 + price_change)
-            
-            # Generate volume
-            volume = np.random.randint(1000, 10000)
-            
-            # Create timestamp
-            timestamp = datetime.now(timezone.utc)
+            # Drop feeds for symbols nobody is watching any more
+            for symbol in [s for s in mock_feeds if not symbol_subs.get(s)]:
+                del mock_feeds[symbol]
+                symbol_subs.pop(symbol, None)
             
-            # Update technical indicators
-            if symbol not in active_symbols:
-                active_symbols[symbol] = TechnicalIndicators()
+            payloads = {}
+            for symbol in [s for s, subs in symbol_subs.items() if subs]:
+                try:
+                    payloads[symbol] = update_symbol(symbol)
+                except Exception as e:
+                    logging.error(f"Error in mock data generation for {symbol}: {str(e)}")
             
-            indicators = active_symbols[symbol]
-            indicators.add_data_point(current_price, volume, timestamp)
+            # Send data to all subscribers
+            await asyncio.gather(*(broadcast(symbol, payload) for symbol, payload in payloads.items()))
             
-            # Calculate technical indicators
-            sma_20 = indicators.calculate_sma(20)
-            sma_50 = indicators.calculate_sma(50)
-            ema_20 = indicators.calculate_ema(20)
-            rsi = indicators.calculate_rsi(14)
-            vwap = indicators.calculate_vwap()
-            bollinger = indicators.calculate_bollinger_bands()
-            
-            # Create data packet
-            data = {
-                "type": "market_data",
-                "symbol": symbol,
-                "timestamp": timestamp.isoformat(),
-                "price": round(current_price, 2),
-                "volume": volume,
-                "indicators": {
-                    "sma_20": round(sma_20, 2) if sma_20 else None,
-                    "sma_50": round(sma_50, 2) if sma_50 else None,
-                    "ema_20": round(ema_20, 2) if ema_20 else None,
-                    "rsi": round(rsi, 2) if rsi else None,
-                    "vwap": round(vwap, 2) if vwap else None,
-                    "bollinger_bands": {k: round(v, 2) if v else None for k, v in bollinger.items()}
-                }
-            }
-            
-            # Send data via WebSocket
-            await websocket.send_text(json.dumps(data))
-            
-            # Check for patterns and generate AI analysis periodically
-            if len(indicators.prices) >= 20 and len(indicators.prices) % 10 == 0:
-                await generate_ai_analysis(symbol, indicators, websocket)
-            
-            # Wait before next data point
-            await asyncio.sleep(2)  # 2 seconds between updates
-            
-        except WebSocketDisconnect:
-            break
+            # Check for patterns and generate AI analysis periodically,
+            # batching every symbol that is due into one request
+            due = [
+                symbol for symbol in payloads
+                if beat % ANALYSIS_EVERY_TICKS == 0
+                and symbol in active_symbols and active_symbols[symbol].n >= 20
+            ]
+            if due:
+                task = asyncio.create_task(generate_ai_analyses(due))
+                analysis_tasks.add(task)
+                task.add_done_callback(analysis_tasks.discard)
         except Exception as e:
-            logging.error(f"Error in mock data generation for {symbol}: {str(e)}")
-            break
-
-async def generate_ai_analysis(symbol: str, indicators: TechnicalIndicators, websocket: WebSocket):
-    """Generate AI-powered pattern recognition and analysis"""
-    try:
-        # Prepare market data context for AI analysis
-        recent_prices = list(indicators.prices)[-20:]  # Last 20 data points
-        price_change = (recent_prices[-1] - recent_prices[0]) / recent_prices[0] * 100
-        
-        rsi = indicators.calculate_rsi()
-        sma_20 = indicators.calculate_sma(20)
-        current_price = recent_prices[-1]
+            logging.error(f"Error in market ticker: {str(e)}")
         
-        # Create context for AI analysis
-        market_context = f"""
-Symbol: {symbol}
-Current Price: ${current_price:.2f}
-20-period Price Change: {price_change:.2f}%
-RSI: {rsi:.2f if rsi else 'N/A'}
-SMA(20): ${sma_20:.2f if sma_20 else 'N/A'}
-Recent Price Trend: {', '.join([f'${p:.2f}' for p in recent_prices[-5:]])}
-
-Please analyze this market data and provide:
-1. Pattern identification (if any)
-2. Market sentiment assessment
-3. Brief trading recommendation
-4. Confidence score (0-100)
+        # Wait before next data point
+        await asyncio.sleep(max(0.0, TICK_INTERVAL - (loop.time() - started)))
 
-Format your response as JSON:
-{{
-  "pattern": "pattern name or null",
-  "sentiment": "bullish/bearish/neutral",
-  "recommendation": "brief recommendation",
-  "confidence": "confidence score",
-  "reasoning": "brief explanation"
-}}
-"""
+def market_snapshot(symbol: str, indicators: TechnicalIndicators) -> Dict[str, Any]:
+    """Summarize the recent state of a symbol for AI analysis"""
+    recent_prices = indicators.recent_prices(20)  # Last 20 data points
+    return {
+        "symbol": symbol,
+        "price": float(recent_prices[-1]),
+        "price_change_pct": float((recent_prices[-1] - recent_prices[0]) / recent_prices[0] * 100),
+        "rsi": indicators.calculate_rsi(),
+        "sma_20": indicators.calculate_sma(20),
+        "trend": recent_prices[-5:].tolist()
+    }
 
-        # Initialize LLM Chat for pattern analysis
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"market_analysis_{symbol}_{uuid.uuid4()}",
-            system_message="You are an AI financial analyst specialized in technical analysis and pattern recognition. Provide concise, data-driven insights based on market indicators."
-        ).with_model("openai", "gpt-4o")
+async def request_ai_analyses(snapshots: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Ask the LLM to analyze several symbols in one request.
 
-        # Get AI analysis
-        user_message = UserMessage(text=market_context)
-        response = await chat.send_message(user_message)
-        
-        # Parse AI response
-        try:
-            ai_analysis = json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback analysis
-            ai_analysis = {
-                "pattern": None,
-                "sentiment": "neutral",
-                "recommendation": "Hold position, monitor market conditions",
-                "confidence": 60,
-                "reasoning": "Technical analysis based on current indicators"
-            }
-        
-        # Create analysis data packet
-        analysis_data = {
-            "type": "ai_analysis",
-            "symbol": symbol,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "analysis": ai_analysis,
-            "current_price": current_price
+    Returns the analyses keyed by symbol; symbols missing from the reply
+    yield no entry. Raises ValueError if the reply is not a JSON object.
+    """
+    rounded = [
+        {
+            "symbol": snap["symbol"],
+            "price": round(snap["price"], 2),
+            "price_change_pct": round(snap["price_change_pct"], 2),
+            "rsi": round_opt(snap["rsi"]),
+            "sma_20": round_opt(snap["sma_20"]),
+            "trend": [round(p, 2) for p in snap["trend"]]
         }
+        for snap in snapshots
+    ]
+    # Only the trailing market data varies between requests
+    market_context = ANALYSIS_INSTRUCTIONS + orjson.dumps({"snapshots": rounded}).decode()
+    
+    # Get AI analysis
+    user_message = UserMessage(text=market_context)
+    response = await new_chat().send_message(user_message)
+    
+    # Parse AI response; a reply with no decodable object fails the whole batch
+    parsed = parse_json_reply(response)
+    if not isinstance(parsed, dict):
+        raise ValueError("LLM analysis reply is not a JSON object")
+    return {symbol: analysis for symbol, analysis in parsed.items() if isinstance(analysis, dict)}
+
+def parse_confidence(value: Any) -> float:
+    """Read a confidence score the model may give as a number, "85" or "85%" """
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    return float(value)
+
+def analysis_record(symbol: str, ai_analysis: Dict[str, Any]) -> MarketAnalysis:
+    """Build the stored record for an analysis; raises if the analysis is malformed"""
+    return MarketAnalysis(
+        symbol=symbol,
+        analysis=ai_analysis.get("reasoning", "AI-powered market analysis"),
+        pattern_detected=ai_analysis.get("pattern"),
+        confidence_score=parse_confidence(ai_analysis.get("confidence", 60)),
+        recommendation=ai_analysis.get("recommendation", "Monitor market conditions")
+    )
+
+async def publish_analysis(snapshot: Dict[str, Any], ai_analysis: Dict[str, Any]):
+    """Broadcast an analysis to the symbol's subscribers and queue it for storage"""
+    symbol = snapshot["symbol"]
+    # Validate before anything is sent
+    record = analysis_record(symbol, ai_analysis)
+    
+    # Create analysis data packet
+    analysis_data = {
+        "type": "ai_analysis",
+        "symbol": symbol,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "analysis": ai_analysis,
+        "current_price": snapshot["price"]
+    }
+    
+    # Send AI analysis to all subscribers
+    await broadcast(symbol, pack(analysis_data))
+    
+    # Store analysis in database
+    _insert_queue.put_nowait(record.model_dump(mode='python'))
+
+async def generate_ai_analyses(symbols: List[str]):
+    """Generate AI-powered pattern recognition and analysis for several symbols"""
+    try:
+        snapshots = [market_snapshot(symbol, active_symbols[symbol]) for symbol in symbols if symbol in active_symbols]
         
-        # Send AI analysis via WebSocket
-        await websocket.send_text(json.dumps(analysis_data))
+        # Near-identical market states share a cached analysis
+        cache_keys = [analysis_cache_key(snap) for snap in snapshots]
+        cached = await asyncio.gather(*(cache_get(key) for key in cache_keys))
+        analyses = {snap["symbol"]: hit for snap, hit in zip(snapshots, cached) if hit is not None}
         
-        # Store analysis in database
-        analysis_record = MarketAnalysis(
-            symbol=symbol,
-            analysis=ai_analysis.get("reasoning", "AI-powered market analysis"),
-            pattern_detected=ai_analysis.get("pattern"),
-            confidence_score=float(ai_analysis.get("confidence", 60)),
-            recommendation=ai_analysis.get("recommendation", "Monitor market conditions")
-        )
+        # One LLM request covers every cache miss
+        misses = [(snap, key) for snap, key in zip(snapshots, cache_keys) if snap["symbol"] not in analyses]
+        to_cache = []
+        rejected = set()
+        if misses:
+            # A failed request only loses the misses; cache hits are still published
+            try:
+                fresh = await request_ai_analyses([snap for snap, _ in misses])
+            except Exception as e:
+                logging.error(f"Error in AI analysis for {', '.join(snap['symbol'] for snap, _ in misses)}: {str(e)}")
+                fresh = {}
+                rejected.update(snap["symbol"] for snap, _ in misses)
+            for snap, key in misses:
+                ai_analysis = fresh.get(snap["symbol"])
+                if ai_analysis is None:
+                    continue
+                # Malformed analyses are neither published nor cached
+                try:
+                    analysis_record(snap["symbol"], ai_analysis)
+                except Exception as e:
+                    logging.error(f"Invalid AI analysis for {snap['symbol']}: {str(e)}")
+                    rejected.add(snap["symbol"])
+                    continue
+                analyses[snap["symbol"]] = ai_analysis
+                to_cache.append((key, ai_analysis))
         
-        prepared_data = prepare_for_mongo(analysis_record.dict())
-        await db.market_analysis.insert_one(prepared_data)
+        for snap in snapshots:
+            ai_analysis = analyses.get(snap["symbol"])
+            if ai_analysis is None:
+                if snap["symbol"] not in rejected:
+                    logging.error(f"No AI analysis returned for {snap['symbol']}")
+                continue
+            # One bad symbol must not drop the rest of the batch
+            try:
+                await publish_analysis(snap, ai_analysis)
+            except Exception as e:
+                logging.error(f"Error publishing AI analysis for {snap['symbol']}: {str(e)}")
         
+        # Cache fresh analyses only after they have been broadcast
+        await asyncio.gather(*(cache_put(key, ai_analysis) for key, ai_analysis in to_cache))
+        
+    except Exception as e:
+        logging.error(f"Error in AI analysis for {', '.join(symbols)}: {str(e)}")
+
+async def flush_analysis_batch(batch: List[Dict[str, Any]]):
+    try:
+        await market_analysis_w0.insert_many(batch, ordered=False)
+    except Exception as e:
+        logging.error(f"Error writing {len(batch)} analysis records: {str(e)}")
+
+async def analysis_writer():
+    """Drain queued analysis records into MongoDB in batches.
+
+    A batch is flushed once it holds ANALYSIS_BATCH_SIZE records or
+    ANALYSIS_FLUSH_INTERVAL seconds after its first record, whichever comes
+    first. A ``None`` item flushes what is pending and stops the writer.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await _insert_queue.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = loop.time() + ANALYSIS_FLUSH_INTERVAL
+        stop = False
+        while len(batch) < ANALYSIS_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_insert_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        await flush_analysis_batch(batch)
+        if stop:
+            return
+
+async def prewarm_llm():
+    """Open the LLM provider connection before the first real analysis.
+
+    Goes through new_chat() like the analyses, so it warms the same HTTP
+    transport; the prompt asks for a one-word reply to keep the call cheap.
+    """
+    try:
+        await new_chat().send_message(UserMessage(text="Reply with the single word OK."))
+        logger.info("LLM connection pre-warmed")
     except Exception as e:
-        logging.error(f"Error in AI analysis for {symbol}: {str(e)}")
+        logger.warning(f"LLM pre-warm failed: {str(e)}")
+
+async def ensure_indexes():
+    """Create the collection indexes in the background.
+
+    Startup must not depend on MongoDB being reachable, so failures are only
+    logged; the indexes are created on the next start.
+    """
+    indexes = [
+        (db.llm_cache, "hash", {"unique": True}),
+        (db.llm_cache, "created_at", {"expireAfterSeconds": LLM_CACHE_TTL_SECONDS}),
+        (db.market_analysis, [("symbol", 1), ("timestamp", -1)], {}),
+        (db.price_alerts, [("created_at", -1)], {}),
+    ]
+    for collection, keys, options in indexes:
+        try:
+            await collection.create_index(keys, **options)
+        except Exception as e:
+            logger.warning(f"Could not create index {keys} on {collection.name}: {str(e)}")
 
 # Helper functions
-def prepare_for_mongo(data):
-    """Convert datetime objects to ISO strings for MongoDB storage"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
-
-def parse_from_mongo(item):
-    """Convert ISO strings back to datetime objects"""
-    if isinstance(item, dict):
-        for key, value in item.items():
-            if key.endswith('_at') or key == 'timestamp' or key == 'created_at':
-                if isinstance(value, str):
-                    try:
-                        item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    except:
-                        pass
-    return item
+def round_opt(value: Optional[float], digits: int = 2) -> Optional[float]:
+    """Round an indicator value, passing None through (0.0 is a real value)"""
+    return round(value, digits) if value is not None else None
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def pack(data) -> bytes:
+    """Encode a WebSocket frame as msgpack"""
+    return msgpack.packb(data, use_bin_type=True, datetime=True, default=_msgpack_default)
+
+def analysis_cache_key(snapshot: Dict[str, Any]) -> str:
+    """Quantize a market snapshot so near-duplicate states map to the same key"""
+    rsi, sma_20, price = snapshot["rsi"], snapshot["sma_20"], snapshot["price"]
+    rsi_bucket = int(rsi) if rsi is not None else None
+    sma_gap = round((price - sma_20) / sma_20 * 100, 1) if sma_20 else None
+    return f"analysis|{snapshot['symbol']}|{round(snapshot['price_change_pct'], 1)}|{rsi_bucket}|{sma_gap}"
+
+async def cache_get(key: str) -> Optional[Dict[str, Any]]:
+    """Look up a cached LLM response by the SHA256 of its key.
+
+    Any database error or a slow lookup counts as a miss.
+    """
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    try:
+        doc = await asyncio.wait_for(
+            db.llm_cache.find_one({"hash": digest}, {"_id": 0, "response": 1}),
+            LLM_CACHE_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logging.warning(f"LLM cache lookup failed: {e!r}")
+        return None
+    return doc["response"] if doc else None
+
+async def cache_put(key: str, response: Dict[str, Any]):
+    """Store an LLM response; created_at drives the TTL index.
+
+    Failures are logged and otherwise ignored.
+    """
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    try:
+        await asyncio.wait_for(
+            db.llm_cache.update_one(
+                {"hash": digest},
+                {"$set": {"response": response, "created_at": datetime.now(timezone.utc)}},
+                upsert=True
+            ),
+            LLM_CACHE_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logging.warning(f"LLM cache write failed: {e!r}")
 
 # API Routes
 @api_router.get("/")
@@ -364,12 +769,10 @@ async def get_current_indicators(symbol: str):
     
     indicators = active_symbols[symbol]
     
-    if len(indicators.prices) == 0:
+    if indicators.n == 0:
         raise HTTPException(status_code=404, detail="No data available for symbol")
     
-    current_price = list(indicators.prices)[-1]
-    current_volume = list(indicators.volumes)[-1]
-    timestamp = list(indicators.timestamps)[-1]
+    current_price, current_volume, timestamp = indicators.latest()
     
     return {
         "symbol": symbol,
@@ -394,8 +797,8 @@ async def get_market_analysis(symbol: str, limit: int = 10):
             {"symbol": symbol}, {"_id": 0}
         ).sort("timestamp", -1).limit(limit).to_list(limit)
         
-        parsed_analyses = [parse_from_mongo(analysis) for analysis in analyses]
-        return {"symbol": symbol, "analyses": parsed_analyses}
+        # Documents were validated on the way in; ORJSONResponse serializes their datetimes
+        return {"symbol": symbol, "analyses": analyses}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch analysis: {str(e)}")
@@ -404,8 +807,7 @@ async def get_market_analysis(symbol: str, limit: int = 10):
 async def create_price_alert(alert: PriceAlert):
     """Create a price alert for a symbol"""
     try:
-        prepared_data = prepare_for_mongo(alert.dict())
-        result = await db.price_alerts.insert_one(prepared_data)
+        result = await db.price_alerts.insert_one(alert.model_dump(mode='python'))
         return {"message": "Alert created successfully", "alert_id": str(result.inserted_id)}
         
     except Exception as e:
@@ -416,8 +818,7 @@ async def get_price_alerts():
     """Get all price alerts"""
     try:
         alerts = await db.price_alerts.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-        parsed_alerts = [parse_from_mongo(alert) for alert in alerts]
-        return {"alerts": parsed_alerts}
+        return {"alerts": alerts}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch alerts: {str(e)}")
@@ -425,55 +826,75 @@ async def get_price_alerts():
 # WebSocket endpoint for real-time data streaming
 @api_router.websocket("/ws/market/{symbol}")
 async def websocket_market_data(websocket: WebSocket, symbol: str):
-    """WebSocket endpoint for real-time market data streaming"""
-    await websocket.accept()
-    connection_id = f"{symbol}_{id(websocket)}"
-    websocket_connections[connection_id] = websocket
-    
-    logging.info(f"WebSocket connection established for {symbol}")
+    """WebSocket endpoint for real-time market data streaming.
+
+    Every frame in both directions is a binary msgpack-encoded map with a
+    ``type`` key: the server sends ``connection``, ``market_data``,
+    ``ai_analysis`` and ``pong``; clients may send ``ping``.
+    """
+    # Turned-away clients are accepted and then closed with 1013 (try again later);
+    # closing before accept() would only reach them as an HTTP 403 handshake failure
+    at_capacity = WS_SEM.locked()
+    # Streamed symbols are never evicted, so bound how many distinct ones there are
+    too_many_symbols = (not symbol_subs.get(symbol)
+                        and sum(1 for subs in symbol_subs.values() if subs) >= MAX_SYMBOLS)
+    if at_capacity or too_many_symbols:
+        await websocket.accept()
+        await websocket.close(code=1013)
+        return
     
-    try:
-        # Send initial connection confirmation
-        await websocket.send_text(json.dumps({
-            "type": "connection",
-            "message": f"Connected to {symbol} market data stream",
-            "symbol": symbol,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }))
+    async with WS_SEM:
+        await websocket.accept()
+        connection_id = f"{symbol}_{id(websocket)}"
+        websocket_connections[connection_id] = websocket
         
-        # Start mock data generation for the symbol
-        data_task = asyncio.create_task(generate_mock_market_data(symbol, websocket))
-        mock_data_tasks[connection_id] = data_task
-        
-        # Keep connection alive and handle incoming messages
-        while True:
-            try:
-                # Wait for client messages (can be used for commands)
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                
-                if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-                
-            except WebSocketDisconnect:
-                break
-            except Exception as e:
-                logging.error(f"WebSocket message error: {str(e)}")
-                continue
-                
-    except Exception as e:
-        logging.error(f"WebSocket error for {symbol}: {str(e)}")
-    
-    finally:
-        # Clean up connection
-        if connection_id in websocket_connections:
-            del websocket_connections[connection_id]
+        logging.info(f"WebSocket connection established for {symbol}")
         
-        if connection_id in mock_data_tasks:
-            mock_data_tasks[connection_id].cancel()
-            del mock_data_tasks[connection_id]
+        try:
+            # Send initial connection confirmation
+            await websocket.send_bytes(pack({
+                "type": "connection",
+                "message": f"Connected to {symbol} market data stream",
+                "symbol": symbol,
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }))
+            
+            # Subscribe; the market ticker starts streaming on its next beat
+            symbol_subs[symbol].add(websocket)
+            
+            # Keep connection alive and handle incoming messages
+            while True:
+                try:
+                    # Wait for client messages (can be used for commands)
+                    data = await websocket.receive_bytes()
+                    message = msgpack.unpackb(data)
+                    
+                    if message.get("type") == "ping":
+                        await websocket.send_bytes(pack({"type": "pong"}))
+                    
+                except WebSocketDisconnect:
+                    break
+                except Exception as e:
+                    logging.error(f"WebSocket message error: {str(e)}")
+                    continue
+                    
+        except Exception as e:
+            logging.error(f"WebSocket error for {symbol}: {str(e)}")
         
-        logging.info(f"WebSocket connection closed for {symbol}")
+        finally:
+            # Clean up connection
+            if connection_id in websocket_connections:
+                del websocket_connections[connection_id]
+            
+            # Forget the symbol with its last subscriber so client-chosen keys can't
+            # pile up; the ticker drops its feed on the next beat
+            subs = symbol_subs.get(symbol)
+            if subs is not None:
+                subs.discard(websocket)
+                if not subs:
+                    del symbol_subs[symbol]
+            
+            logging.info(f"WebSocket connection closed for {symbol}")
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -482,7 +903,7 @@ app.include_router(api_router)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_origins=CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -496,16 +917,29 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
+    global analysis_writer_task, market_ticker_task, prewarm_task, index_task
     logger.info("FinTech AI Platform starting up...")
+    analysis_writer_task = asyncio.create_task(analysis_writer())
+    market_ticker_task = asyncio.create_task(market_ticker())
+    prewarm_task = asyncio.create_task(prewarm_llm())
+    index_task = asyncio.create_task(ensure_indexes())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     # Clean up connections and tasks
-    for task in mock_data_tasks.values():
+    for task in (market_ticker_task, prewarm_task, index_task):
+        if task is not None:
+            task.cancel()
+    for task in analysis_tasks:
         task.cancel()
     
     for ws in websocket_connections.values():
         await ws.close()
     
+    # Flush pending analysis records before the client goes away
+    if analysis_writer_task is not None:
+        _insert_queue.put_nowait(None)
+        await analysis_writer_task
+    
     client.close()
     logger.info("FinTech AI Platform shutting down...")
\ No newline at end of file
@@ -1,71 +1,11 @@
-import requests
+import asyncio
 import sys
 import json
-import time
 from datetime import datetime
+from base_tester import BaseAPITester, logger
 
-class MeetingSummarizerAPITester:
-    def __init__(self, base_url="https://meetsum-ai.preview.emergentagent.com"):
-        self.base_url = base_url
-        self.api_url = f"{base_url}/api"
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.created_meeting_id = None
-
-    def run_test(self, name, method, endpoint, expected_status, data=None, files=None):
-        """Run a single API test"""
-        url = f"{self.api_url}/{endpoint}" if endpoint else f"{self.api_url}/"
-        headers = {'Content-Type': 'application/json'} if not files else {}
-
-        self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
-        
-        try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == 'POST':
-                if files:
-                    response = requests.post(url, data=data, files=files, timeout=60)
-                else:
-                    response = requests.post(url, json=data, headers=headers, timeout=60)
-
-            success = response.status_code == expected_status
-            if success:
-                self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
-                try:
-                    response_data = response.json()
-                    print(f"   Response keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'Non-dict response'}")
-                    return True, response_data
-                except:
-                    return True, {}
-            else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
-                try:
-                    error_detail = response.json()
-                    print(f"   Error: {error_detail}")
-                except:
-                    print(f"   Error: {response.text}")
-                return False, {}
-
-        except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
-            return False, {}
-
-    def test_root_endpoint(self):
-        """Test the root API endpoint"""
-        success, response = self.run_test(
-            "Root API Endpoint",
-            "GET",
-            "",
-            200
-        )
-        return success
-
-    def test_text_summarization(self):
-        """Test text summarization endpoint"""
-        sample_meeting_content = """
+# Request payloads, built and encoded once per process
+SAMPLE_MEETING_CONTENT = """
 Team Meeting - January 15, 2024
 
 Attendees: Sarah (PM), Mike (Dev), Lisa (Designer), Tom (QA)
@@ -86,40 +26,8 @@ Action Items:
 
 Next meeting: January 22, 2024
 """
-        
-        success, response = self.run_test(
-            "Text Summarization",
-            "POST",
-            "summarize-text",
-            200,
-            data={
-                "title": "Test Team Meeting - Backend API Test",
-                "content": sample_meeting_content
-            }
-        )
-        
-        if success and response:
-            # Store the meeting ID for later tests
-            self.created_meeting_id = response.get('id')
-            print(f"   Created meeting ID: {self.created_meeting_id}")
-            
-            # Validate response structure
-            required_fields = ['id', 'title', 'summary', 'action_items', 'key_points', 'created_at']
-            missing_fields = [field for field in required_fields if field not in response]
-            if missing_fields:
-                print(f"   ⚠️  Missing fields in response: {missing_fields}")
-            else:
-                print(f"   ✅ All required fields present")
-                print(f"   Summary length: {len(response.get('summary', ''))}")
-                print(f"   Action items count: {len(response.get('action_items', []))}")
-                print(f"   Key points count: {len(response.get('key_points', []))}")
-        
-        return success
 
-    def test_file_upload_summarization(self):
-        """Test file upload summarization endpoint"""
-        # Create a test file content
-        test_content = """Project Kickoff Meeting - February 1, 2024
+TEST_FILE_CONTENT = """Project Kickoff Meeting - February 1, 2024
 
 Attendees: John (Lead), Alice (Dev), Bob (Designer)
 
@@ -138,17 +46,70 @@ Next Steps:
 - Weekly standup meetings every Monday
 - Code review process to be established
 """
+
+_TEXT_BODY = json.dumps({
+    "title": "Test Team Meeting - Backend API Test",
+    "content": SAMPLE_MEETING_CONTENT
+}).encode("utf-8")
+_FILE_TUPLE = ('test_meeting.txt', TEST_FILE_CONTENT.encode('utf-8'), 'text/plain')
+
+class MeetingSummarizerAPITester(BaseAPITester):
+    title = "AI Meeting Summarizer API Tests"
+    banner_width = 50
+
+    def __init__(self, base_url="https://meetsum-ai.preview.emergentagent.com"):
+        super().__init__(base_url)
+        self.created_meeting_id = None
+
+    async def test_root_endpoint(self):
+        """Test the root API endpoint"""
+        success, response = await self.run_test(
+            "Root API Endpoint",
+            "GET",
+            "",
+            200
+        )
+        return success
+
+    async def test_text_summarization(self):
+        """Test text summarization endpoint"""
+        success, response = await self.run_test(
+            "Text Summarization",
+            "POST",
+            "summarize-text",
+            200,
+            raw_body=_TEXT_BODY
+        )
         
-        # Create a temporary file-like object
+        if success and response:
+            # Store the meeting ID for later tests
+            self.created_meeting_id = response.get('id')
+            logger.info(f"   Created meeting ID: {self.created_meeting_id}")
+            
+            # Validate response structure
+            required_fields = ['id', 'title', 'summary', 'action_items', 'key_points', 'created_at']
+            missing_fields = [field for field in required_fields if field not in response]
+            if missing_fields:
+                logger.info(f"   ⚠️  Missing fields in response: {missing_fields}")
+            else:
+                logger.info(f"   ✅ All required fields present")
+                logger.info(f"   Summary length: {len(response.get('summary', ''))}")
+                logger.info(f"   Action items count: {len(response.get('action_items', []))}")
+                logger.info(f"   Key points count: {len(response.get('key_points', []))}")
+        
+        return success
+
+    async def test_file_upload_summarization(self):
+        """Test file upload summarization endpoint"""
         files = {
-            'file': ('test_meeting.txt', test_content, 'text/plain')
+            'file': _FILE_TUPLE
         }
         
         data = {
             'title': 'Test File Upload Meeting - Backend API Test'
         }
         
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "File Upload Summarization",
             "POST",
             "summarize-file",
@@ -158,15 +119,15 @@ Next Steps:
         )
         
         if success and response:
-            print(f"   File processing successful")
-            print(f"   Summary length: {len(response.get('summary', ''))}")
-            print(f"   Action items count: {len(response.get('action_items', []))}")
+            logger.info(f"   File processing successful")
+            logger.info(f"   Summary length: {len(response.get('summary', ''))}")
+            logger.info(f"   Action items count: {len(response.get('action_items', []))}")
         
         return success
 
-    def test_get_all_meetings(self):
+    async def test_get_all_meetings(self):
         """Test getting all meetings"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Meetings",
             "GET",
             "meetings",
@@ -175,21 +136,21 @@ Next Steps:
         
         if success and response:
             if isinstance(response, list):
-                print(f"   Found {len(response)} meetings")
+                logger.info(f"   Found {len(response)} meetings")
                 if len(response) > 0:
-                    print(f"   First meeting title: {response[0].get('title', 'N/A')}")
+                    logger.info(f"   First meeting title: {response[0].get('title', 'N/A')}")
             else:
-                print(f"   ⚠️  Expected list, got {type(response)}")
+                logger.info(f"   ⚠️  Expected list, got {type(response)}")
         
         return success
 
-    def test_get_specific_meeting(self):
+    async def test_get_specific_meeting(self):
         """Test getting a specific meeting by ID"""
         if not self.created_meeting_id:
-            print("   ⚠️  Skipping - No meeting ID available from previous tests")
+            logger.info("   ⚠️  Skipping - No meeting ID available from previous tests")
             return True
         
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Specific Meeting",
             "GET",
             f"meetings/{self.created_meeting_id}",
@@ -197,73 +158,58 @@ Next Steps:
         )
         
         if success and response:
-            print(f"   Retrieved meeting: {response.get('title', 'N/A')}")
+            logger.info(f"   Retrieved meeting: {response.get('title', 'N/A')}")
         
         return success
 
-    def test_invalid_endpoints(self):
+    async def test_invalid_endpoints(self):
         """Test error handling for invalid requests"""
-        print(f"\n🔍 Testing Error Handling...")
+        logger.info(f"\n🔍 Testing Error Handling...")
         
         # Test empty text summarization
-        success, _ = self.run_test(
+        success, _ = await self.run_test(
             "Empty Text Summarization",
             "POST",
             "summarize-text",
             422,  # Validation error expected
-            data={"title": "", "content": ""}
+            data={"title": "", "content": ""},
+            body_needed=False
         )
         
         # Test non-existent meeting
-        success2, _ = self.run_test(
+        success2, _ = await self.run_test(
             "Non-existent Meeting",
             "GET",
             "meetings/non-existent-id",
-            404
+            404,
+            body_needed=False
         )
         
         return success and success2
 
-def main():
-    print("🚀 Starting AI Meeting Summarizer API Tests")
-    print("=" * 50)
-    
-    # Setup
-    tester = MeetingSummarizerAPITester()
-    
-    # Run all tests
-    print(f"\n📡 Testing API at: {tester.api_url}")
-    
-    # Basic connectivity
-    if not tester.test_root_endpoint():
-        print("❌ Root endpoint failed, stopping tests")
-        return 1
-    
-    # Core functionality tests
-    tester.test_text_summarization()
-    time.sleep(2)  # Give AI processing time
-    
-    tester.test_file_upload_summarization()
-    time.sleep(2)  # Give AI processing time
-    
-    tester.test_get_all_meetings()
-    tester.test_get_specific_meeting()
-    
-    # Error handling tests
-    tester.test_invalid_endpoints()
-    
-    # Print results
-    print(f"\n📊 Test Results:")
-    print(f"   Tests run: {tester.tests_run}")
-    print(f"   Tests passed: {tester.tests_passed}")
-    print(f"   Success rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
-    
-    if tester.tests_passed == tester.tests_run:
-        print("🎉 All tests passed!")
-        return 0
-    else:
-        print("⚠️  Some tests failed - check logs above")
-        return 1
+    async def run_all(self):
+        """Run the suite over the shared multiplexed HTTP/2 connection.
+
+        Returns False if the gating connectivity check failed.
+        """
+        await self._warm_up()
+
+        # Basic connectivity
+        if not await self.test_root_endpoint():
+            logger.info("❌ Root endpoint failed, stopping tests")
+            return False
+        
+        # Independent core functionality and error handling tests run concurrently
+        await asyncio.gather(
+            self.test_text_summarization(),
+            self.test_file_upload_summarization(),
+            self.test_get_all_meetings(),
+            self.test_invalid_endpoints()
+        )
+        
+        # Needs the meeting created by the text summarization test
+        await self.test_get_specific_meeting()
+        return True
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(MeetingSummarizerAPITester.main())
\ No newline at end of file
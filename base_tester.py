@@ -0,0 +1,238 @@
+import asyncio
+import httpx
+import orjson
+import time
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("apitest")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # results are reported in the table
+
+# Header for pre-encoded JSON bodies; json= and files= calls let httpx set their own
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Process-wide HTTP/2 clients keyed by API root, shared by every tester in the process
+_SHARED_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+@dataclass
+class TestResult:
+    """Outcome of one API call, reported in the summary table"""
+    __test__ = False  # not a pytest test class
+
+    name: str
+    url: str
+    status: Optional[int]
+    ok: bool
+    duration: float
+    payload_keys: Optional[List[str]] = None
+    error: Optional[str] = None
+
+def log_results_table(results):
+    """Log every recorded TestResult as one table"""
+    lines = [f"\n   {'Test':<43} {'Status':>6} {'Time':>8}  Details"]
+    for r in results:
+        mark = "✅" if r.ok else "❌"
+        detail = r.error if r.error else (f"keys: {r.payload_keys}" if r.payload_keys is not None else "")
+        lines.append(f"{mark} {r.name:<43} {r.status or '-':>6} {r.duration * 1000:>6.0f}ms  {detail}")
+    logger.info("\n".join(lines))
+
+class BaseAPITester(ABC):
+    """Counters, result recording and the shared HTTP client for the API test suites.
+
+    Subclasses implement run_all(); drive them through run_suites() so the shared
+    client is closed on the event loop that used it. The class attributes below set
+    each suite's banner and how many tests must pass for report() to succeed.
+    """
+    __test__ = False  # not a pytest test class
+
+    title = "API Tests"
+    banner_width = 60
+    pass_threshold = 1.0  # fraction of tests that must pass
+    pass_message = "🎉 All tests passed!"
+    fail_message = "⚠️  Some tests failed - check logs above"
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.results: List[TestResult] = []
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The process-wide client for this API root, created on first use"""
+        client = _SHARED_CLIENTS.get(self.api_url)
+        if client is None or client.is_closed:
+            client = _SHARED_CLIENTS[self.api_url] = httpx.AsyncClient(
+                base_url=f"{self.api_url}/",
+                http2=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+                timeout=30
+            )
+        return client
+
+    @staticmethod
+    async def close_shared():
+        """Close every shared client; call once, after the last suite has run"""
+        clients = list(_SHARED_CLIENTS.values())
+        _SHARED_CLIENTS.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def _send(self, method, endpoint, data=None, files=None,
+                    raw_body: Optional[bytes] = None, body_needed: bool = True) -> httpx.Response:
+        """Issue one request; with body_needed=False the body is closed unread"""
+        if files:
+            body = {'data': data, 'files': files}
+        elif raw_body is not None:
+            # Pre-encoded JSON body; skips per-call serialization
+            body = {'content': raw_body, 'headers': _JSON_HEADERS}
+        else:
+            body = {'json': data}
+        # POSTs may wait on the LLM, so they get the longer timeout
+        timeout = 30 if method == 'GET' else 60
+
+        if not body_needed:
+            # Status-only check: the body is never downloaded or decoded
+            async with self.client.stream(method, endpoint, timeout=timeout, **body) as response:
+                return response
+        return await self.client.request(method, endpoint, timeout=timeout, **body)
+
+    @staticmethod
+    def _status_ok(status_code, expected_status) -> bool:
+        if isinstance(expected_status, tuple):
+            return status_code in expected_status
+        return status_code == expected_status
+
+    async def run_test(self, name, method, endpoint, expected_status, data=None, files=None,
+                       raw_body: Optional[bytes] = None, body_needed: bool = True):
+        """Run a single API test and record its TestResult; endpoint is relative to the client's base_url"""
+        url = f"{self.api_url}/{endpoint}"
+
+        self.tests_run += 1
+        started = time.perf_counter()
+
+        try:
+            response = await self._send(method, endpoint, data, files, raw_body, body_needed)
+
+            # Decode the body once; both branches below reuse it
+            response_data = None
+            if body_needed:
+                try:
+                    response_data = orjson.loads(response.content) if response.content else {}
+                except ValueError:
+                    pass
+
+            success = self._status_ok(response.status_code, expected_status)
+            if success:
+                self.tests_passed += 1
+                if response_data is None:
+                    self._record(name, url, response.status_code, True, started)
+                    return True, {}
+                keys = list(response_data.keys()) if isinstance(response_data, dict) else None
+                self._record(name, url, response.status_code, True, started, payload_keys=keys)
+                return True, response_data
+            else:
+                if response_data is not None:
+                    error_detail = response_data
+                else:
+                    error_detail = response.text if body_needed else "(body not read)"
+                self._record(name, url, response.status_code, False, started,
+                             error=f"Expected {expected_status}, got {response.status_code}: {error_detail}")
+                return False, {}
+
+        except Exception as e:
+            self._record(name, url, None, False, started, error=str(e))
+            return False, {}
+
+    async def run_fanout(self, name, method, endpoints, expected_status):
+        """Run status-only requests to several endpoints concurrently and record them as one test.
+
+        The test passes only if every endpoint returns an expected status, so a
+        fan-out weighs as much as any other single test in the pass rate.
+        """
+        self.tests_run += 1
+        started = time.perf_counter()
+
+        responses = await asyncio.gather(
+            *(self._send(method, endpoint, body_needed=False) for endpoint in endpoints),
+            return_exceptions=True
+        )
+        failures = []
+        for endpoint, response in zip(endpoints, responses):
+            if isinstance(response, Exception):
+                failures.append(f"{endpoint}: {response}")
+            elif not self._status_ok(response.status_code, expected_status):
+                failures.append(f"{endpoint}: got {response.status_code}")
+
+        ok = not failures
+        if ok:
+            self.tests_passed += 1
+        self._record(name, f"{self.api_url}/", None, ok, started,
+                     error=f"Expected {expected_status}; " + "; ".join(failures) if failures else None)
+        return ok
+
+    def _record(self, name, url, status, ok, started, **details):
+        self.results.append(TestResult(name, url, status, ok, time.perf_counter() - started, **details))
+
+    async def _warm_up(self):
+        """Resolve DNS and complete the TCP+TLS handshake before any timed test.
+
+        The result is ignored; it only leaves a live connection in the pool.
+        """
+        try:
+            await self.client.head("", timeout=10)
+        except httpx.HTTPError as e:
+            logger.info(f"   ⚠️  Warm-up request failed: {e}")
+
+    @abstractmethod
+    async def run_all(self):
+        """Run the suite; returns False if a gating connectivity check failed"""
+
+    def report(self):
+        """Log the results table and summary; returns the exit code"""
+        log_results_table(self.results)
+        logger.info(f"\n📊 Test Results:")
+        logger.info(f"   Tests run: {self.tests_run}")
+        logger.info(f"   Tests passed: {self.tests_passed}")
+        logger.info(f"   Success rate: {(self.tests_passed/self.tests_run)*100:.1f}%")
+
+        if self.tests_passed >= self.tests_run * self.pass_threshold:
+            logger.info(self.pass_message)
+            return 0
+        else:
+            logger.info(self.fail_message)
+            return 1
+
+    @classmethod
+    def main(cls):
+        """Run this suite on its own; returns the exit code"""
+        logger.info(f"🚀 Starting {cls.title}")
+        logger.info("=" * cls.banner_width)
+
+        # Setup
+        tester = cls()
+
+        # Run all tests
+        logger.info(f"\n📡 Testing API at: {tester.api_url}")
+
+        if not asyncio.run(run_suites([tester])):
+            # Show why the gating check failed
+            log_results_table(tester.results)
+            return 1
+
+        # Print results
+        return tester.report()
+
+async def run_suites(testers):
+    """Run each tester's suite in turn over the shared clients, then close them.
+
+    Returns False if any suite stopped at a gating check.
+    """
+    try:
+        outcomes = [await tester.run_all() for tester in testers]
+    finally:
+        await BaseAPITester.close_shared()
+    return all(outcomes)
@@ -1,62 +1,38 @@
-import requests
+import asyncio
 import sys
-import json
 import time
-import websocket
-import threading
+from collections import defaultdict
+from typing import List
+import websockets
+import msgpack
 from datetime import datetime
+from base_tester import BaseAPITester, logger
 
-class FinTechAPITester:
-    def __init__(self, base_url="https://meetsum-ai.preview.emergentagent.com"):
-        self.base_url = base_url
-        self.api_url = f"{base_url}/api"
-        self.ws_url = base_url.replace('https://', 'wss://').replace('http://', 'ws://')
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.ws_messages = []
-        self.ws_connected = False
-
-    def run_test(self, name, method, endpoint, expected_status, data=None):
-        """Run a single API test"""
-        url = f"{self.api_url}/{endpoint}" if endpoint else f"{self.api_url}/"
-        headers = {'Content-Type': 'application/json'}
-
-        self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
-        
-        try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+# Upper bound on symbols covered by the per-symbol fan-out tests, to bound server load
+MAX_FANOUT_SYMBOLS = 20
 
-            success = response.status_code == expected_status
-            if success:
-                self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
-                try:
-                    response_data = response.json()
-                    print(f"   Response keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'Non-dict response'}")
-                    return True, response_data
-                except:
-                    return True, {}
-            else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
-                try:
-                    error_detail = response.json()
-                    print(f"   Error: {error_detail}")
-                except:
-                    print(f"   Error: {response.text}")
-                return False, {}
+class FinTechAPITester(BaseAPITester):
+    title = "FinTech AI Platform API Tests"
+    pass_threshold = 0.8  # 80% pass rate acceptable
+    pass_message = "🎉 Most tests passed - Backend appears functional!"
+    fail_message = "⚠️  Many tests failed - Backend needs attention"
 
-        except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
-            return False, {}
+    def __init__(self, base_url="https://meetsum-ai.preview.emergentagent.com"):
+        super().__init__(base_url)
+        self.ws_url = base_url.replace('https://', 'wss://').replace('http://', 'ws://')
+        # Symbols reported by test_get_symbols; the WebSocket test probes each of them
+        self.symbols: List[str] = []
+        # One WebSocket per symbol, held open from _ws_setup() until _ws_teardown()
+        self.ws_connections = {}
+        self.ws_readers: List[asyncio.Task] = []
+        self.ws_messages = defaultdict(list)
+        self.ws_messages_by_type = defaultdict(list)
+        # Set when the first message of each type arrives
+        self.ws_type_events = defaultdict(asyncio.Event)
 
-    def test_root_endpoint(self):
+    async def test_root_endpoint(self):
         """Test the root API endpoint"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Root API Endpoint",
             "GET",
             "",
@@ -67,17 +43,17 @@ class FinTechAPITester:
             expected_fields = ['message', 'version']
             missing_fields = [field for field in expected_fields if field not in response]
             if missing_fields:
-                print(f"   ⚠️  Missing fields: {missing_fields}")
+                logger.info(f"   ⚠️  Missing fields: {missing_fields}")
             else:
-                print(f"   ✅ Root endpoint working correctly")
-                print(f"   Message: {response.get('message')}")
-                print(f"   Version: {response.get('version')}")
+                logger.info(f"   ✅ Root endpoint working correctly")
+                logger.info(f"   Message: {response.get('message')}")
+                logger.info(f"   Version: {response.get('version')}")
         
         return success
 
-    def test_health_check(self):
+    async def test_health_check(self):
         """Test the health check endpoint"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Health Check",
             "GET",
             "health",
@@ -88,18 +64,18 @@ class FinTechAPITester:
             expected_fields = ['status', 'timestamp', 'active_symbols', 'active_connections']
             missing_fields = [field for field in expected_fields if field not in response]
             if missing_fields:
-                print(f"   ⚠️  Missing fields: {missing_fields}")
+                logger.info(f"   ⚠️  Missing fields: {missing_fields}")
             else:
-                print(f"   ✅ Health check working correctly")
-                print(f"   Status: {response.get('status')}")
-                print(f"   Active symbols: {response.get('active_symbols')}")
-                print(f"   Active connections: {response.get('active_connections')}")
+                logger.info(f"   ✅ Health check working correctly")
+                logger.info(f"   Status: {response.get('status')}")
+                logger.info(f"   Active symbols: {response.get('active_symbols')}")
+                logger.info(f"   Active connections: {response.get('active_connections')}")
         
         return success
 
-    def test_get_symbols(self):
+    async def test_get_symbols(self):
         """Test getting available symbols"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Available Symbols",
             "GET",
             "symbols",
@@ -109,58 +85,50 @@ class FinTechAPITester:
         if success and response:
             symbols = response.get('symbols', [])
             if symbols:
-                print(f"   ✅ Found {len(symbols)} symbols")
-                print(f"   First symbol: {symbols[0].get('symbol')} - {symbols[0].get('name')}")
+                self.symbols = [item['symbol'] for item in symbols if item.get('symbol')]
+                logger.info(f"   ✅ Found {len(symbols)} symbols")
+                logger.info(f"   First symbol: {symbols[0].get('symbol')} - {symbols[0].get('name')}")
                 
                 # Validate symbol structure
                 required_symbol_fields = ['symbol', 'name', 'price']
                 for symbol in symbols[:3]:  # Check first 3 symbols
                     missing = [field for field in required_symbol_fields if field not in symbol]
                     if missing:
-                        print(f"   ⚠️  Symbol {symbol.get('symbol')} missing fields: {missing}")
+                        logger.info(f"   ⚠️  Symbol {symbol.get('symbol')} missing fields: {missing}")
             else:
-                print(f"   ⚠️  No symbols returned")
+                logger.info(f"   ⚠️  No symbols returned")
         
         return success
 
-    def test_get_indicators(self):
+    async def test_get_indicators(self):
         """Test getting technical indicators for a symbol"""
-        # First try to get indicators for AAPL (might not have data initially)
-        success, response = self.run_test(
+        # AAPL has no data until its first tick, which may land mid-test because the
+        # WebSocket setup subscribes it concurrently, so either status is correct
+        success, response = await self.run_test(
             "Get Technical Indicators (AAPL)",
             "GET",
             "indicators/AAPL",
-            404  # Expected 404 if no data yet
+            (200, 404)
         )
         
-        if not success:
-            # Try with expected 404 status
-            success, response = self.run_test(
-                "Get Technical Indicators (AAPL) - Expected 404",
-                "GET", 
-                "indicators/AAPL",
-                404
-            )
-            if success:
-                print(f"   ✅ Correctly returns 404 when no data available")
-                return True
-        else:
+        if success and 'detail' in response:
+            logger.info(f"   ✅ Correctly returns 404 when no data available")
+        elif success and response:
             # If we got 200, validate the response structure
-            if response:
-                expected_fields = ['symbol', 'timestamp', 'price', 'volume', 'indicators']
-                missing_fields = [field for field in expected_fields if field not in response]
-                if missing_fields:
-                    print(f"   ⚠️  Missing fields: {missing_fields}")
-                else:
-                    print(f"   ✅ Indicators response structure correct")
-                    indicators = response.get('indicators', {})
-                    print(f"   Available indicators: {list(indicators.keys())}")
+            expected_fields = ['symbol', 'timestamp', 'price', 'volume', 'indicators']
+            missing_fields = [field for field in expected_fields if field not in response]
+            if missing_fields:
+                logger.info(f"   ⚠️  Missing fields: {missing_fields}")
+            else:
+                logger.info(f"   ✅ Indicators response structure correct")
+                indicators = response.get('indicators', {})
+                logger.info(f"   Available indicators: {list(indicators.keys())}")
         
         return success
 
-    def test_get_analysis(self):
+    async def test_get_analysis(self):
         """Test getting AI analysis for a symbol"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get AI Analysis (AAPL)",
             "GET",
             "analysis/AAPL",
@@ -171,17 +139,43 @@ class FinTechAPITester:
             expected_fields = ['symbol', 'analyses']
             missing_fields = [field for field in expected_fields if field not in response]
             if missing_fields:
-                print(f"   ⚠️  Missing fields: {missing_fields}")
+                logger.info(f"   ⚠️  Missing fields: {missing_fields}")
             else:
                 analyses = response.get('analyses', [])
-                print(f"   ✅ Found {len(analyses)} analyses for AAPL")
+                logger.info(f"   ✅ Found {len(analyses)} analyses for AAPL")
                 if analyses:
                     first_analysis = analyses[0]
-                    print(f"   First analysis keys: {list(first_analysis.keys())}")
+                    logger.info(f"   First analysis keys: {list(first_analysis.keys())}")
         
         return success
 
-    def test_create_price_alert(self):
+    async def test_indicators_all(self):
+        """Test indicators for every symbol listed by test_get_symbols; 404 just means no data yet"""
+        if not self.symbols:
+            logger.info(f"   ⚠️  No symbols cached, skipping multi-symbol indicators test")
+            return False
+        symbols = self.symbols[:MAX_FANOUT_SYMBOLS]
+        return await self.run_fanout(
+            f"Get Technical Indicators ({len(symbols)} symbols)",
+            "GET",
+            [f"indicators/{symbol}" for symbol in symbols],
+            (200, 404)
+        )
+
+    async def test_analysis_all(self):
+        """Test AI analysis for every symbol listed by test_get_symbols"""
+        if not self.symbols:
+            logger.info(f"   ⚠️  No symbols cached, skipping multi-symbol analysis test")
+            return False
+        symbols = self.symbols[:MAX_FANOUT_SYMBOLS]
+        return await self.run_fanout(
+            f"Get AI Analysis ({len(symbols)} symbols)",
+            "GET",
+            [f"analysis/{symbol}" for symbol in symbols],
+            200
+        )
+
+    async def test_create_price_alert(self):
         """Test creating a price alert"""
         alert_data = {
             "id": f"test_alert_{int(time.time())}",
@@ -192,7 +186,7 @@ class FinTechAPITester:
             "triggered": False
         }
         
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Create Price Alert",
             "POST",
             "alerts",
@@ -204,16 +198,16 @@ class FinTechAPITester:
             expected_fields = ['message', 'alert_id']
             missing_fields = [field for field in expected_fields if field not in response]
             if missing_fields:
-                print(f"   ⚠️  Missing fields: {missing_fields}")
+                logger.info(f"   ⚠️  Missing fields: {missing_fields}")
             else:
-                print(f"   ✅ Alert created successfully")
-                print(f"   Alert ID: {response.get('alert_id')}")
+                logger.info(f"   ✅ Alert created successfully")
+                logger.info(f"   Alert ID: {response.get('alert_id')}")
         
         return success
 
-    def test_get_price_alerts(self):
+    async def test_get_price_alerts(self):
         """Test getting price alerts"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Price Alerts",
             "GET",
             "alerts",
@@ -222,154 +216,201 @@ class FinTechAPITester:
         
         if success and response:
             alerts = response.get('alerts', [])
-            print(f"   ✅ Found {len(alerts)} alerts")
+            logger.info(f"   ✅ Found {len(alerts)} alerts")
             if alerts:
                 first_alert = alerts[0]
-                print(f"   First alert keys: {list(first_alert.keys())}")
-                print(f"   First alert symbol: {first_alert.get('symbol')}")
+                logger.info(f"   First alert keys: {list(first_alert.keys())}")
+                logger.info(f"   First alert symbol: {first_alert.get('symbol')}")
         
         return success
 
-    def test_websocket_connection(self):
-        """Test WebSocket connection for real-time data"""
-        print(f"\n🔍 Testing WebSocket Connection...")
+    async def _ws_setup(self, symbols):
+        """Open one WebSocket per symbol and start reading from each"""
+        logger.info(f"\n🔍 Opening WebSocket Connections...")
+        logger.info(f"   WebSocket URL: {self.ws_url}/api/ws/market/{{symbol}} for {len(symbols)} symbols")
         
-        ws_url = f"{self.ws_url}/api/ws/market/AAPL"
-        print(f"   WebSocket URL: {ws_url}")
+        # All subscriptions share this event loop
+        outcomes = await asyncio.gather(
+            *(websockets.connect(f"{self.ws_url}/api/ws/market/{symbol}", open_timeout=8)
+              for symbol in symbols),
+            return_exceptions=True
+        )
         
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                self.ws_messages.append(data)
-                print(f"   📨 Received: {data.get('type', 'unknown')} message")
-                if data.get('type') == 'market_data':
-                    print(f"      Price: ${data.get('price', 0):.2f}")
-                    print(f"      Volume: {data.get('volume', 0):,}")
-                elif data.get('type') == 'ai_analysis':
-                    print(f"      AI Analysis received for {data.get('symbol')}")
-            except Exception as e:
-                print(f"   ❌ Error parsing message: {e}")
-
-        def on_error(ws, error):
-            print(f"   ❌ WebSocket error: {error}")
+        for symbol, outcome in zip(symbols, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.info(f"   ❌ WebSocket connection failed for {symbol}: {outcome!r}")
+                continue
+            logger.info(f"   ✅ WebSocket connected for {symbol}")
+            self.ws_connections[symbol] = outcome
+            # Send a ping message
+            await outcome.send(msgpack.packb({"type": "ping"}))
+            self.ws_readers.append(asyncio.create_task(self._read_stream(symbol, outcome)))
 
-        def on_close(ws, close_status_code, close_msg):
-            print(f"   🔌 WebSocket closed")
-            self.ws_connected = False
+    async def _read_stream(self, symbol, ws):
+        """Record every message on one socket by symbol and by type"""
+        try:
+            async for message in ws:
+                try:
+                    data = msgpack.unpackb(message)
+                except Exception as e:
+                    logger.info(f"   ❌ Error parsing {symbol} message: {e}")
+                    continue
+                msg_type = data.get('type', 'unknown')
+                self.ws_messages[symbol].append(data)
+                self.ws_messages_by_type[msg_type].append(data)
+                self.ws_type_events[msg_type].set()
+                logger.info(f"   📨 Received: {msg_type} message for {symbol}")
+                if msg_type == 'market_data':
+                    logger.info(f"      Price: ${data.get('price', 0):.2f}")
+                    logger.info(f"      Volume: {data.get('volume', 0):,}")
+                elif msg_type == 'ai_analysis':
+                    logger.info(f"      AI Analysis received for {data.get('symbol')}")
+        except websockets.ConnectionClosed:
+            pass
 
-        def on_open(ws):
-            print(f"   ✅ WebSocket connected successfully")
-            self.ws_connected = True
-            # Send a ping message
-            ws.send(json.dumps({"type": "ping"}))
+    async def _ws_teardown(self):
+        """Close every WebSocket opened by _ws_setup()"""
+        await asyncio.gather(*(ws.close() for ws in self.ws_connections.values()),
+                             return_exceptions=True)
+        await asyncio.gather(*self.ws_readers, return_exceptions=True)
+        if self.ws_connections:
+            logger.info(f"   🔌 WebSockets closed")
+        self.ws_connections.clear()
+        self.ws_readers.clear()
 
+    async def _wait_for_message_type(self, msg_type, timeout):
+        """Wait until a message of msg_type has arrived on any open socket"""
         try:
-            ws = websocket.WebSocketApp(ws_url,
-                                      on_open=on_open,
-                                      on_message=on_message,
-                                      on_error=on_error,
-                                      on_close=on_close)
-            
-            # Run WebSocket in a separate thread
-            ws_thread = threading.Thread(target=ws.run_forever)
-            ws_thread.daemon = True
-            ws_thread.start()
-            
-            # Wait for connection and some messages
-            time.sleep(10)  # Wait 10 seconds for messages
-            
-            ws.close()
-            
-            if self.ws_connected or len(self.ws_messages) > 0:
-                print(f"   ✅ WebSocket test successful")
-                print(f"   📊 Received {len(self.ws_messages)} messages")
-                
-                # Analyze message types
-                message_types = {}
-                for msg in self.ws_messages:
-                    msg_type = msg.get('type', 'unknown')
-                    message_types[msg_type] = message_types.get(msg_type, 0) + 1
-                
-                print(f"   📈 Message types: {message_types}")
-                return True
-            else:
-                print(f"   ❌ WebSocket connection failed")
-                return False
-                
-        except Exception as e:
-            print(f"   ❌ WebSocket test failed: {e}")
+            await asyncio.wait_for(self.ws_type_events[msg_type].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _assert_market_data_received(self):
+        """Check that price updates are streaming; recorded as a test result"""
+        self.tests_run += 1
+        started = time.perf_counter()
+        # Prices stream every tick, so this returns as soon as the first one is in
+        ok = await self._wait_for_message_type('market_data', timeout=5)
+        count = len(self.ws_messages_by_type['market_data'])
+        if ok:
+            self.tests_passed += 1
+            logger.info(f"   ✅ market_data received ({count} messages)")
+        else:
+            logger.info(f"   ❌ No market_data received")
+        self._record("WebSocket market_data", f"{self.ws_url}/api/ws/market/", None, ok, started,
+                     error=None if ok else "No market_data message within 5s")
+        return ok
+
+    def _check_ai_analysis_received(self):
+        """Report AI analyses seen so far without waiting for one.
+
+        The server analyzes every ANALYSIS_EVERY_TICKS beats (about 20s), so a
+        short run may legitimately see none; this is informational only.
+        """
+        if self.ws_type_events['ai_analysis'].is_set():
+            logger.info(f"   ✅ ai_analysis received ({len(self.ws_messages_by_type['ai_analysis'])} messages)")
+        else:
+            logger.info(f"   ℹ️  No ai_analysis received during the run")
+
+    async def test_websocket_connection(self):
+        """Test WebSocket connections for real-time data over the sockets opened by _ws_setup()"""
+        logger.info(f"\n🔍 Testing WebSocket Connections...")
+        
+        if not self.ws_connections:
+            logger.info(f"   ❌ WebSocket connection failed")
+            # A total outage counts against the pass rate like a partial one
+            self.tests_run += 1
+            self._record("WebSocket market_data", f"{self.ws_url}/api/ws/market/", None, False,
+                         time.perf_counter(), error="No WebSocket connection opened")
             return False
+        
+        market_data_ok = await self._assert_market_data_received()
+        self._check_ai_analysis_received()
+        
+        for symbol in self.ws_connections:
+            # Analyze message types
+            message_types = {}
+            for msg in self.ws_messages[symbol]:
+                msg_type = msg.get('type', 'unknown')
+                message_types[msg_type] = message_types.get(msg_type, 0) + 1
+            logger.info(f"   📈 {symbol} message types: {message_types}")
+        
+        if market_data_ok:
+            logger.info(f"   ✅ WebSocket test successful for {len(self.ws_connections)} symbols")
+        return market_data_ok
 
-    def test_invalid_endpoints(self):
+    async def test_invalid_endpoints(self):
         """Test error handling for invalid requests"""
-        print(f"\n🔍 Testing Error Handling...")
+        logger.info(f"\n🔍 Testing Error Handling...")
         
         # Test invalid symbol
-        success1, _ = self.run_test(
+        success1, _ = await self.run_test(
             "Invalid Symbol Indicators",
             "GET",
             "indicators/INVALID",
-            404
+            404,
+            body_needed=False
         )
         
         # Test invalid alert data
-        success2, _ = self.run_test(
+        success2, _ = await self.run_test(
             "Invalid Alert Data",
             "POST",
             "alerts",
             422,  # Validation error expected
-            data={"invalid": "data"}
+            data={"invalid": "data"},
+            body_needed=False
         )
         
         return success1 and success2
 
-def main():
-    print("🚀 Starting FinTech AI Platform API Tests")
-    print("=" * 60)
-    
-    # Setup
-    tester = FinTechAPITester()
-    
-    # Run all tests
-    print(f"\n📡 Testing API at: {tester.api_url}")
-    
-    # Basic connectivity tests
-    if not tester.test_root_endpoint():
-        print("❌ Root endpoint failed, stopping tests")
-        return 1
-    
-    if not tester.test_health_check():
-        print("❌ Health check failed, stopping tests")
-        return 1
-    
-    # Core functionality tests
-    tester.test_get_symbols()
-    tester.test_get_indicators()
-    tester.test_get_analysis()
-    
-    # Alert system tests
-    tester.test_create_price_alert()
-    time.sleep(1)  # Brief pause
-    tester.test_get_price_alerts()
-    
-    # WebSocket test (most important for real-time features)
-    tester.test_websocket_connection()
-    
-    # Error handling tests
-    tester.test_invalid_endpoints()
-    
-    # Print results
-    print(f"\n📊 Test Results:")
-    print(f"   Tests run: {tester.tests_run}")
-    print(f"   Tests passed: {tester.tests_passed}")
-    print(f"   Success rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
-    
-    if tester.tests_passed >= tester.tests_run * 0.8:  # 80% pass rate acceptable
-        print("🎉 Most tests passed - Backend appears functional!")
-        return 0
-    else:
-        print("⚠️  Many tests failed - Backend needs attention")
-        return 1
+    async def _test_symbols_and_streams(self):
+        """Fetch the symbol list once, then fan out over it: per-symbol indicator and
+        analysis checks alongside a WebSocket subscription for each symbol"""
+        await self.test_get_symbols()
+        await asyncio.gather(
+            self._ws_setup(self.symbols or ["AAPL"]),
+            self.test_indicators_all(),
+            self.test_analysis_all()
+        )
+
+    async def run_all(self):
+        """Run the suite over the shared multiplexed HTTP/2 connection.
+
+        Returns False if a gating connectivity check failed.
+        """
+        await self._warm_up()
+
+        # Basic connectivity tests
+        if not await self.test_root_endpoint():
+            logger.info("❌ Root endpoint failed, stopping tests")
+            return False
+        
+        if not await self.test_health_check():
+            logger.info("❌ Health check failed, stopping tests")
+            return False
+        
+        try:
+            # Independent core, alert and error handling tests run concurrently while
+            # the WebSockets for every listed symbol open and start streaming
+            await asyncio.gather(
+                self._test_symbols_and_streams(),
+                self.test_get_indicators(),
+                self.test_get_analysis(),
+                self.test_create_price_alert(),
+                self.test_invalid_endpoints()
+            )
+            
+            # Needs the alert created above
+            await self.test_get_price_alerts()
+            
+            # WebSocket test (most important for real-time features) checks what the
+            # sockets received during the run; they are closed only once, below
+            await self.test_websocket_connection()
+        finally:
+            await self._ws_teardown()
+        return True
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(FinTechAPITester.main())
\ No newline at end of file
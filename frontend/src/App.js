@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef, useCallback } from "react";
 import "./App.css";
 import axios from "axios";
+import { decode } from "@msgpack/msgpack";
 import { Button } from "./components/ui/button";
 import { Input } from "./components/ui/input";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "./components/ui/card";
@@ -110,6 +111,7 @@ function App() {
     
     try {
       const ws = new WebSocket(wsUrl);
+      ws.binaryType = "arraybuffer"; // frames are msgpack-encoded
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -120,7 +122,7 @@ function App() {
 
       ws.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const data = decode(new Uint8Array(event.data));
           handleWebSocketMessage(data);
         } catch (error) {
           console.error("Error parsing WebSocket message:", error);
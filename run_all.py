@@ -0,0 +1,28 @@
+import asyncio
+import sys
+from base_tester import logger, run_suites
+import backend_test
+import fintech_backend_test
+
+def main():
+    """Run both API suites back to back over one shared connection pool"""
+    logger.info("🚀 Starting all backend API Tests")
+    logger.info("=" * 60)
+    
+    # Setup
+    testers = [
+        backend_test.MeetingSummarizerAPITester(),
+        fintech_backend_test.FinTechAPITester()
+    ]
+    
+    # Run all tests; the second suite reuses connections warmed by the first
+    logger.info(f"\n📡 Testing API at: {testers[0].api_url}")
+    
+    gated_ok = asyncio.run(run_suites(testers))
+    
+    # Print results
+    exit_codes = [tester.report() for tester in testers]
+    return 0 if gated_ok and not any(exit_codes) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests import backend/server.py directly; it connects to MongoDB lazily, so
+# placeholder settings are enough to import it
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_backend")
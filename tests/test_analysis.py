@@ -0,0 +1,116 @@
+"""Tests for the batched AI analysis pipeline in backend/server.py"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("emergentintegrations")
+
+import server  # noqa: E402
+
+ANALYSIS = {
+    "pattern": "ascending triangle",
+    "sentiment": "bullish",
+    "recommendation": "Hold",
+    "confidence": 80,
+    "reasoning": "Higher lows"
+}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Two tracked symbols with enough history, and the pipeline's I/O captured"""
+    for symbol in ("AAPL", "TSLA"):
+        indicators = server.TechnicalIndicators()
+        for i in range(25):
+            indicators.add_data_point(100.0 + i, 1000, i)
+        monkeypatch.setitem(server.active_symbols, symbol, indicators)
+
+    published = []
+    cache = {}
+
+    async def broadcast(symbol, payload):
+        published.append(symbol)
+
+    async def cache_get(key):
+        return cache.get(key)
+
+    async def cache_put(key, response):
+        cache[key] = response
+
+    monkeypatch.setattr(server, "broadcast", broadcast)
+    monkeypatch.setattr(server, "cache_get", cache_get)
+    monkeypatch.setattr(server, "cache_put", cache_put)
+    monkeypatch.setattr(server, "_insert_queue", asyncio.Queue())
+    return published, cache
+
+
+def cache_key(symbol):
+    return server.analysis_cache_key(server.market_snapshot(symbol, server.active_symbols[symbol]))
+
+
+def test_failed_llm_request_still_publishes_cache_hits(pipeline, monkeypatch):
+    published, cache = pipeline
+    cache[cache_key("AAPL")] = ANALYSIS
+
+    async def request_ai_analyses(snapshots):
+        raise ValueError("LLM reply contains no JSON object")
+
+    monkeypatch.setattr(server, "request_ai_analyses", request_ai_analyses)
+    asyncio.run(server.generate_ai_analyses(["AAPL", "TSLA"]))
+
+    assert published == ["AAPL"]
+    assert cache_key("TSLA") not in cache
+
+
+@pytest.mark.parametrize("reply", [
+    '{"AAPL": {"confidence": 80}}',
+    '```json\n{"AAPL": {"confidence": 80}}\n```',
+    'Here is the analysis:\n{"AAPL": {"confidence": 80}}\nLet me know if you need more.',
+])
+def test_parse_json_reply_tolerates_fences_and_prose(reply):
+    assert server.parse_json_reply(reply) == {"AAPL": {"confidence": 80}}
+
+
+@pytest.mark.parametrize("reply", ["", "No analysis available.", "```json\n[1, 2]\n```", "{not json}"])
+def test_parse_json_reply_rejects_replies_without_an_object(reply):
+    with pytest.raises(ValueError):
+        server.parse_json_reply(reply)
+
+
+@pytest.mark.parametrize("value, expected", [(85, 85.0), (72.5, 72.5), ("85", 85.0), ("85%", 85.0), (" 90 % ", 90.0)])
+def test_parse_confidence_accepts_numbers_and_percentages(value, expected):
+    assert server.parse_confidence(value) == expected
+
+
+@pytest.mark.parametrize("value", ["high", "", None])
+def test_parse_confidence_rejects_non_numeric_values(value):
+    with pytest.raises((TypeError, ValueError)):
+        server.parse_confidence(value)
+
+
+def test_analysis_record_applies_defaults():
+    record = server.analysis_record("AAPL", {"confidence": "85%"})
+    assert record.confidence_score == 85.0
+    assert record.analysis == "AI-powered market analysis"
+    assert record.recommendation == "Monitor market conditions"
+    assert record.pattern_detected is None
+
+
+@pytest.mark.parametrize("analysis", [{**ANALYSIS, "confidence": "high"}, {**ANALYSIS, "recommendation": 5}])
+def test_analysis_record_rejects_malformed_analyses(analysis):
+    with pytest.raises(ValueError):
+        server.analysis_record("AAPL", analysis)
+
+
+def test_malformed_symbol_does_not_block_the_batch(pipeline, monkeypatch):
+    published, cache = pipeline
+
+    async def request_ai_analyses(snapshots):
+        return {"AAPL": {**ANALYSIS, "confidence": "high"}, "TSLA": {**ANALYSIS, "confidence": "85%"}}
+
+    monkeypatch.setattr(server, "request_ai_analyses", request_ai_analyses)
+    asyncio.run(server.generate_ai_analyses(["AAPL", "TSLA"]))
+
+    assert published == ["TSLA"]
+    assert cache_key("AAPL") not in cache
+    assert cache_key("TSLA") in cache
@@ -0,0 +1,108 @@
+"""Regression test for the incremental TechnicalIndicators state.
+
+Every tick, each indicator is compared with a from-scratch recomputation over
+the same rolling window, so errors in the ring-buffer eviction or the running
+sums show up as drift.
+"""
+import math
+import random
+
+import pytest
+
+pytest.importorskip("emergentintegrations")
+
+from server import TechnicalIndicators  # noqa: E402
+
+WINDOW = 50
+TICKS = 2000
+
+
+def sma(prices, period):
+    return sum(prices[-period:]) / period
+
+
+def std(prices, period):
+    recent = prices[-period:]
+    mean = sum(recent) / period
+    return (sum((x - mean) ** 2 for x in recent) / period) ** 0.5
+
+
+def rsi(prices, period):
+    deltas = [prices[i] - prices[i - 1] for i in range(len(prices) - period, len(prices))]
+    avg_gain = sum(d for d in deltas if d > 0) / period
+    avg_loss = sum(-d for d in deltas if d < 0) / period
+    if avg_loss == 0:
+        return 100
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def vwap(prices, volumes):
+    return sum(p * v for p, v in zip(prices, volumes)) / sum(volumes)
+
+
+def window_ema(prices, period):
+    """Recursive EMA seeded with the oldest price in the window"""
+    multiplier = 2 / (period + 1)
+    ema = prices[0]
+    for price in prices[1:]:
+        ema = price * multiplier + ema * (1 - multiplier)
+    return ema
+
+
+def assert_close(actual, expected, label, tick):
+    if expected is None:
+        assert actual is None, f"{label} at tick {tick}: expected None, got {actual}"
+        return
+    assert actual is not None, f"{label} at tick {tick}: got None"
+    assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), \
+        f"{label} at tick {tick}: {actual} != {expected}"
+
+
+def test_incremental_indicators_match_recomputation():
+    rnd = random.Random(42)
+    indicators = TechnicalIndicators(window_size=WINDOW)
+    prices, volumes = [], []
+    price = 180.0
+    ema20 = None
+    multiplier = 2 / 21
+
+    for tick in range(TICKS):
+        price *= 1 + rnd.gauss(0, 0.02)
+        volume = rnd.randint(1000, 10000)
+        indicators.add_data_point(price, volume, tick)
+        prices.append(price)
+        volumes.append(volume)
+        window_prices = prices[-WINDOW:]
+        window_volumes = volumes[-WINDOW:]
+        n = len(window_prices)
+
+        # Incrementally maintained periods
+        assert_close(indicators.calculate_sma(20), sma(window_prices, 20) if n >= 20 else None, "sma_20", tick)
+        assert_close(indicators.calculate_sma(50), sma(window_prices, 50) if n >= 50 else None, "sma_50", tick)
+        assert_close(indicators.calculate_std(20), std(window_prices, 20) if n >= 20 else None, "std_20", tick)
+        assert_close(indicators.calculate_rsi(14), rsi(window_prices, 14) if n >= 15 else None, "rsi_14", tick)
+        assert_close(indicators.calculate_vwap(), vwap(window_prices, window_volumes), "vwap", tick)
+
+        bands = indicators.calculate_bollinger_bands()
+        if n >= 20:
+            mid, width = sma(window_prices, 20), 2 * std(window_prices, 20)
+            assert_close(bands["upper"], mid + width, "bollinger_upper", tick)
+            assert_close(bands["middle"], mid, "bollinger_middle", tick)
+            assert_close(bands["lower"], mid - width, "bollinger_lower", tick)
+        else:
+            assert bands == {"upper": None, "middle": None, "lower": None}
+
+        # The default EMA runs over the whole stream, seeded with the first 20-point SMA
+        if ema20 is not None:
+            ema20 = price * multiplier + ema20 * (1 - multiplier)
+        elif len(prices) >= 20:
+            ema20 = sma(prices, 20)
+        assert_close(indicators.calculate_ema(20), ema20, "ema_20", tick)
+
+        # Other periods fall back to recomputing over the window
+        assert_close(indicators.calculate_sma(10), sma(window_prices, 10) if n >= 10 else None, "sma_10", tick)
+        assert_close(indicators.calculate_rsi(7), rsi(window_prices, 7) if n >= 8 else None, "rsi_7", tick)
+        assert_close(indicators.calculate_ema(10), window_ema(window_prices, 10) if n >= 10 else None, "ema_10", tick)
+
+    assert indicators.n == WINDOW
+    assert indicators.latest() == (prices[-1], volumes[-1], TICKS - 1)